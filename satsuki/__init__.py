@@ -15,22 +15,21 @@ Example:
         $ satsuki --help
 """
 
+import copy
 import fnmatch
+import functools
 import glob
 import hashlib
 import json
 import logging
 import logging.config
 import os
-import platform
-import socket
-import subprocess
-import time
+import re
+import threading
 
 from string import Template
 
-import github
-import github.GithubException
+from satsuki import _files, _hashing, _upload
 
 
 __version__ = "0.1.76"
@@ -40,11 +39,72 @@ logging.config.fileConfig(
     os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logging.conf'))
 logger = logging.getLogger(__name__)        # pylint: disable=invalid-name
 
+_JSON_CACHE = {}
+
+# CI environment variables to fall back on, in order of preference
+_ENV_FALLBACKS = {
+    'slug': (
+        'TRAVIS_REPO_SLUG', 'APPVEYOR_REPO_NAME', 'BUILD_REPOSITORY_NAME'),
+    'commitish': (
+        'TRAVIS_COMMIT', 'APPVEYOR_REPO_COMMIT', 'BUILD_SOURCEVERSION'),
+    'tag': ('TRAVIS_TAG', 'APPVEYOR_REPO_TAG_NAME'),
+}
+
 
 def raise_error(message, exception):
-    """Called to raise exceptions."""
+    """Called to raise exceptions, carrying the logged message."""
     logger.error(message)
-    raise exception
+    raise exception(message)
+
+
+@functools.lru_cache(maxsize=None)
+def _github_client(token):
+    """
+    Get a github.Github client, creating it only once per token. The
+    client keeps a persistent connection to the API, so reusing it avoids
+    a new TCP/TLS handshake for every call.
+    """
+    # deferred so that --help and argument errors skip loading PyGithub
+    import github  # pylint: disable=import-outside-toplevel
+
+    # PyGithub's retry already waits out 403 rate limits and 5xx errors;
+    # also retry 429s, which carry a Retry-After header
+    retry = github.GithubRetry(
+        status_forcelist=list(_upload.RETRY_STATUSES))
+
+    return github.Github(token, retry=retry, per_page=Arguments.PER_PAGE)
+
+
+def _load_json(filename):
+    """
+    Parse a JSON file, reusing the parsed result while the file is
+    unchanged. A deep copy is returned so callers can modify it freely.
+    """
+    file_stat = os.stat(filename)
+    key = (
+        os.path.abspath(filename), file_stat.st_mtime_ns, file_stat.st_size)
+
+    if key not in _JSON_CACHE:
+        # binary, json detects the UTF encoding (and any BOM) itself
+        with open(filename, "rb") as json_file:
+            _JSON_CACHE[key] = json.load(json_file)
+
+    return copy.deepcopy(_JSON_CACHE[key])
+
+
+def _resolve_env(option, default=None):
+    """Return the first CI environment variable set for an option."""
+    return next(
+        (os.environ[key] for key in _ENV_FALLBACKS[option]
+         if key in os.environ), default)
+
+
+def _option_or_env(kwargs, option):
+    """
+    Return an option from kwargs, only falling back on the environment
+    when the option wasn't given at all.
+    """
+    return kwargs[option] if option in kwargs else _resolve_env(option)
 
 
 class Arguments():
@@ -58,18 +118,27 @@ class Arguments():
         working_tag: A github.GitTag of the target release.
         repo: A github.Repository handle for the repo.
         flags: A dict of bools for controlling behavior, including "force",
-            "latest", "pre", "include_tag", "recreate", "draft".
+            "latest", "pre", "include_tag", "recreate", "draft",
+            "trust_filename_hash".
         opts: A dict of strings with various options, including "api_token",
             "body", "file_sha", "files_file", "internal_cmd", "rel_name",
-            "repo_name", "slug", "tag", target_commitish", "user",
-            "user_cmd".
+            "repo_name", "slug", "tag", target_commitish", "upload_workers"
+            (an int), "user", "user_cmd".
         lists: A dict of lists for "file_info", "files", "labels", "mimes"
-            (mime types), "assets"
+            (mime types), "tags" (a dict of the repo's tags by name, None
+            until fetched), and
+            "assets" (a dict of the release's assets by filename and by ID,
+            None until fetched)
     """
 
+    __slots__ = (
+        'gb_subs', 'working_release', 'working_tag', 'repo', 'flags',
+        'opts', 'lists')
+
     # class
     CMD_UPSERT = "upsert"
     CMD_DELETE = "delete"
+    USER_CMDS = frozenset((CMD_UPSERT, CMD_DELETE))
 
     INTERNAL_CMD_CREATE = "i_create"
     INTERNAL_CMD_RECREATE = "i_recreate"
@@ -84,31 +153,24 @@ class Arguments():
 
     GB_FILES_FILE = os.path.join('.gravitybee', 'gravitybee-files.json')
     GB_INFO_FILE = os.path.join('.gravitybee', 'gravitybee-info.json')
-    MAX_UPLOAD_ATTEMPTS = 3
+    MAX_UPLOAD_ATTEMPTS = _upload.MAX_UPLOAD_ATTEMPTS
+    DEFAULT_UPLOAD_WORKERS = 4
 
     HASH_FILE = "$platform-sha256.json"
 
-    PER_PAGE = 1000
-
-    @classmethod
-    def get_hash(cls, filename):
-        """Produce SHA256 for the given file."""
-        if os.path.exists(filename):
-            sha256 = hashlib.sha256()
-            with open(filename, "rb") as hash_file:
-                for chunk in iter(lambda: hash_file.read(4096), b""):
-                    sha256.update(chunk)
-            return sha256.hexdigest()
+    PER_PAGE = 100
 
-        return None
+    get_file_size = staticmethod(_hashing.get_file_size)
+    get_hash = staticmethod(_hashing.get_hash)
 
     def __init__(self, **kwargs):
         """Starts the initialization process."""
 
-        # Remove unused options
-        empty_keys = [key for key, val in kwargs.items() if not val]
-        for key in empty_keys:
-            del kwargs[key]
+        # Remove unused options (None, False, empty strings and lists),
+        # keeping a 0 for upload_workers so validation can reject it
+        kwargs = {
+            key: val for key, val in kwargs.items()
+            if val or (key == 'upload_workers' and val is not None)}
 
         # preserving $vars means extra quotes
         for key, val in kwargs.items():
@@ -151,7 +213,7 @@ class Arguments():
 
         # this should never happen so an assertion is used
         assert isinstance(self.opts["internal_cmd"], str), \
-            "No internal command, user command: " + self.opts["user_cmd"]
+            f"No internal command, user command: {self.opts['user_cmd']}"
 
     def _init_basic(self, kwargs):
         """Initialize basic attributes (auth, user command, slug)."""
@@ -164,27 +226,18 @@ class Arguments():
                 PermissionError)
 
         # user command
-        if not kwargs.get('command', False):
+        command = kwargs.get('command', None)
+        if not command:
             self.opts["user_cmd"] = Arguments.CMD_UPSERT
-        elif kwargs.get('command') == Arguments.CMD_UPSERT or \
-                kwargs.get('command') == Arguments.CMD_DELETE:
-            self.opts["user_cmd"] = kwargs.get('command')
+        elif command in Arguments.USER_CMDS:
+            self.opts["user_cmd"] = command
         else:
-            raise_error(
-                "Invalid command:" + kwargs.get('command'),
-                AttributeError)
+            raise_error(f"Invalid command: {command}", AttributeError)
 
         self.flags["force"] = kwargs.get('force', False)
 
         # slug or repo / user - required
-        self.opts["slug"] = kwargs.get(
-            'slug',
-            os.environ.get(
-                'TRAVIS_REPO_SLUG',
-                os.environ.get(
-                    'APPVEYOR_REPO_NAME',
-                    os.environ.get(
-                        'BUILD_REPOSITORY_NAME', None))))
+        self.opts["slug"] = _option_or_env(kwargs, 'slug')
 
         if isinstance(self.opts["slug"], str) and '/' not in self.opts["slug"]:
             logger.warning("Invalid repo slug: %s", self.opts["slug"])
@@ -206,14 +259,7 @@ class Arguments():
 
         self.flags["recreate"] = kwargs.get('recreate', False)
 
-        self.opts["target_commitish"] = kwargs.get(
-            'commitish',
-            os.environ.get(
-                'TRAVIS_COMMIT',
-                os.environ.get(
-                    'APPVEYOR_REPO_COMMIT',
-                    os.environ.get(
-                        'BUILD_SOURCEVERSION', None))))
+        self.opts["target_commitish"] = _option_or_env(kwargs, 'commitish')
 
         self.opts["gb_info_file"] = kwargs.get(
             'gb_info_file',
@@ -229,10 +275,7 @@ class Arguments():
             logger.info("Setting up variable substitution...")
 
             # open gravitybee info file and use app version
-            with open(
-                self.opts["gb_info_file"], "r", encoding="utf8"
-            ) as info_file:
-                gb_info = json.loads(info_file.read())
+            gb_info = _load_json(self.opts["gb_info_file"])
 
             if gb_info.get('app_version', None) is not None:
                 self.gb_subs['gb_pkg_ver'] = gb_info['app_version']
@@ -250,6 +293,14 @@ class Arguments():
         else:
             logger.info("No variable substitution. No GravityBee file found.")
 
+    def _substitute(self, text):
+        """Substitute GravityBee variables, if text has any."""
+        # no "$" means nothing to substitute (or unescape)
+        if '$' not in text:
+            return text
+
+        return Template(text).safe_substitute(self.gb_subs)
+
     def _init_tag(self, kwargs):
         """Initialize the tag from CLI, GH, GB, or CI."""
         # find out if we can get a release (need tag or latest)
@@ -259,14 +310,11 @@ class Arguments():
         self.opts["tag"] = kwargs.get('tag', None)
 
         if self.opts["tag"]:
-            self.opts["tag"] = Template(self.opts["tag"]).safe_substitute(
-                self.gb_subs)
+            self.opts["tag"] = self._substitute(self.opts["tag"])
 
         if not isinstance(self.opts["tag"], str) and not self.flags["latest"]:
             # check for Travis & AppVeyor values
-            self.opts["tag"] = os.environ.get(
-                'TRAVIS_TAG',
-                os.environ.get('APPVEYOR_REPO_TAG_NAME', None))
+            self.opts["tag"] = _resolve_env('tag')
             if self.opts["tag"] is None:
                 raise_error(
                     "Either tag or the latest flag is required.",
@@ -341,26 +389,30 @@ class Arguments():
         self.lists["labels"] = kwargs.get('label', [])
         self.lists["mimes"] = kwargs.get('mime', [])
         self.opts["file_sha"] = kwargs.get('file_sha', Arguments.FILE_SHA_NONE)
+        self.flags["trust_filename_hash"] = kwargs.get(
+            'trust_filename_hash', False)
         self.opts["files_file"] = kwargs.get('files_file', None)
         self.lists["file_info"] = []
 
+        self.opts["upload_workers"] = int(kwargs.get(
+            'upload_workers', Arguments.DEFAULT_UPLOAD_WORKERS))
+        if self.opts["upload_workers"] < 1:
+            raise_error(
+                "Upload workers must be at least 1: "
+                f"{self.opts['upload_workers']}",
+                AttributeError)
+
     def _init_files_file(self):
         """Handle the files_file."""
         if self.opts["files_file"] \
                 and os.path.isfile(self.opts["files_file"]):
-            with open(
-                self.opts["files_file"], "r", encoding="utf8"
-            ) as files_file:
-                self.lists["file_info"] += json.loads(files_file.read())
+            self.lists["file_info"] += _load_json(self.opts["files_file"])
 
     def _init_gb_files_file(self):
         """Handle the GravityBee files_file."""
         if os.path.exists(Arguments.GB_FILES_FILE) \
                 and self.opts["user_cmd"] == Arguments.CMD_UPSERT:
-            with open(
-                Arguments.GB_FILES_FILE, "r", encoding="utf8"
-            ) as files_file:
-                self.lists["file_info"] += json.loads(files_file.read())
+            self.lists["file_info"] += _load_json(Arguments.GB_FILES_FILE)
 
     def _init_cmd_line_files(self):
         """Handle the command line files, et al."""
@@ -373,14 +425,17 @@ class Arguments():
             if len(self.lists["files"]) != len(self.lists["labels"]) \
                     and len(self.lists["labels"]) not in [0, 1]:
                 raise_error(
-                    "Invalid number of labels: " + len(self.lists["labels"]),
+                    f"Invalid number of labels: {len(self.lists['labels'])}",
                     AttributeError
                 )
 
             if len(self.lists["files"]) != len(self.lists["mimes"]) \
                     and len(self.lists["mimes"]) not in [0, 1]:
-                raise_error("Invalid number of MIME types: " + len(
-                    self.lists["mimes"]), AttributeError)
+                raise_error(
+                    "Invalid number of MIME types: "
+                    f"{len(self.lists['mimes'])}",
+                    AttributeError
+                )
 
             if self.opts["user_cmd"] == Arguments.CMD_UPSERT:
                 self._init_upsert()
@@ -389,42 +444,37 @@ class Arguments():
 
     def _init_upsert(self):
 
-        new_files = []    # potentially glob expanded
-
-        # glob expand
-        for i, filename in enumerate(self.lists["files"]):
-            logger.info("Processing: %s", filename)
-            for one_file in glob.glob(filename):
-                logger.info("Glob result: %s", one_file)
-                new_files.append(one_file)
-
-        # setup data structure for each file
-        for i, filename in enumerate(new_files):
-            info = {}
-            info['filename'] = os.path.basename(filename)
-            info['path'] = filename
-            if self.lists["labels"]:
+        labels = self.lists["labels"]
+        mimes = self.lists["mimes"]
+        seen_files = set()
 
-                if len(self.lists["labels"]) == 1:
-                    info['label'] = Template(
-                        self.lists["labels"][0]).safe_substitute(self.gb_subs)
-                else:
-                    info['label'] = Template(
-                        self.lists["labels"][i]).safe_substitute(self.gb_subs)
+        # glob expand, skipping files already matched by another pattern.
+        # labels and mimes go with the pattern, not with each matched file
+        for i, matched_files in enumerate(
+                _files.expand_files(self.lists["files"])):
 
-            else:
+            label = None
+            if labels:
+                label = self._substitute(
+                    labels[0] if len(labels) == 1 else labels[i])
 
-                info['label'] = info['filename']
+            mime = None
+            if mimes:
+                mime = mimes[0] if len(mimes) == 1 else mimes[i]
 
-            if self.lists["mimes"]:
-                if len(self.lists["mimes"]) == 1:
-                    info['mime-type'] = self.lists["mimes"][0]
-                else:
-                    info['mime-type'] = self.lists["mimes"][i]
-            else:
-                info['mime-type'] = None
+            for one_file in matched_files:
+                if one_file in seen_files:
+                    continue
+                seen_files.add(one_file)
+                logger.info("Glob result: %s", one_file)
 
-            self.lists["file_info"].append(info)
+                # setup data structure for each file
+                info = {}
+                info['filename'] = os.path.basename(one_file)
+                info['path'] = one_file
+                info['label'] = label if labels else info['filename']
+                info['mime-type'] = mime
+                self.lists["file_info"].append(info)
 
     def _init_delete(self):
 
@@ -444,31 +494,44 @@ class Arguments():
         if self.lists["file_info"] \
                 and self.opts["user_cmd"] == Arguments.CMD_UPSERT:
             preprocessed_files = []    # will replace self.lists["file_info"]
-            sha_dict = {}
+            file_sha = self.opts["file_sha"]
 
             for info in self.lists["file_info"]:
-                # take care of sha hash and existence of file
-                if self.opts["file_sha"] is not Arguments.FILE_SHA_NONE:
-                    info['sha256'] = Arguments.get_hash(info['path'])
+                # take care of existence of file, keeping its size for upload
+                info['size'] = Arguments.get_file_size(info['path'])
+                if info['size'] is None:
+                    logger.info(
+                        "Skipping file. %s does not exist", info['path'])
+                    continue
 
-                if self.opts["file_sha"] == Arguments.FILE_SHA_LABEL:
-                    info['label'] += " (SHA256: " + info['sha256'] + ")"
+                preprocessed_files.append(info)
 
-                elif self.opts["file_sha"] == Arguments.FILE_SHA_SEP_FILE:
-                    sha_dict[info['filename']] = info['sha256']
+            # take care of sha hash
+            if file_sha != Arguments.FILE_SHA_NONE:
+                _hashing.hash_files(
+                    preprocessed_files, self.flags["trust_filename_hash"])
 
-                if os.path.isfile(info['path']):
-                    preprocessed_files.append(info)
-                else:
-                    logger.info(
-                        "Skipping file. %s does not exist", info['path'])
+            if file_sha == Arguments.FILE_SHA_LABEL:
+                for info in preprocessed_files:
+                    info['label'] = \
+                        f"{info['label']} (SHA256: {info['sha256']})"
+
+            elif file_sha == Arguments.FILE_SHA_SEP_FILE:
+                sha_dict = {
+                    info['filename']: info['sha256']
+                    for info in preprocessed_files}
+
+                # only needed to name the sha file so imported here
+                import platform  # pylint: disable=import-outside-toplevel
+                system = platform.system()
 
-            if self.opts["file_sha"] == Arguments.FILE_SHA_SEP_FILE:
                 sha_filename = Template(Arguments.HASH_FILE).safe_substitute({
-                    'platform': platform.system().lower()})
+                    'platform': system.lower()})
 
-                with open(sha_filename, 'w', encoding='utf8') as sha_file:
-                    sha_file.write(json.dumps(sha_dict))
+                # hash and size come from the bytes written, not a re-read
+                sha_payload = json.dumps(sha_dict).encode('utf8')
+                with open(sha_filename, 'wb') as sha_file:
+                    sha_file.write(sha_payload)
 
                 # add the sha hash file to the list of uploads
                 if self.lists["file_info"]:
@@ -476,15 +539,14 @@ class Arguments():
                     info = {}
                     info['filename'] = sha_filename
                     info['path'] = sha_filename
-                    info['sha256'] = Arguments.get_hash(sha_filename)
-                    info['label'] = "SHA256 hash(es) for " \
-                        + platform.system() \
-                        + " file(s)\n(This file: " \
-                        + info['sha256'] \
-                        + ")"
+                    info['size'] = len(sha_payload)
+                    info['sha256'] = hashlib.sha256(sha_payload).hexdigest()
+                    info['label'] = (
+                        f"SHA256 hash(es) for {system} file(s)\n"
+                        f"(This file: {info['sha256']})")
                     info['mime-type'] = "application/json"
 
-                    if platform.system().lower() == "windows":
+                    if system.lower() == "windows":
                         preprocessed_files.insert(0, info)
                     else:
                         preprocessed_files.append(info)
@@ -528,8 +590,7 @@ class Arguments():
             self.opts["body"] = self.working_release.body
         else:
             # possible template expansion
-            self.opts["body"] = Template(
-                self.opts["body"]).safe_substitute(self.gb_subs)
+            self.opts["body"] = self._substitute(self.opts["body"])
 
         self.opts["rel_name"] = kwargs.get('rel_name', None)
 
@@ -538,9 +599,7 @@ class Arguments():
             self.opts["rel_name"] = self.working_release.title
         else:
             # possible template expansion
-            self.opts["rel_name"] = Template(
-                self.opts["rel_name"]).safe_substitute(
-                    self.gb_subs)
+            self.opts["rel_name"] = self._substitute(self.opts["rel_name"])
 
     def _init_data_blank(self, kwargs):
         """Initialize data when release is created."""
@@ -553,11 +612,10 @@ class Arguments():
 
         if self.opts["body"] is None:
             # use existing value if none given
-            self.opts["body"] = "Release " + self.opts["tag"]
+            self.opts["body"] = f"Release {self.opts['tag']}"
         else:
             # possible template expansion
-            self.opts["body"] = Template(
-                self.opts["body"]).safe_substitute(self.gb_subs)
+            self.opts["body"] = self._substitute(self.opts["body"])
 
         self.opts["rel_name"] = kwargs.get('rel_name', None)
 
@@ -566,35 +624,60 @@ class Arguments():
             self.opts["rel_name"] = self.opts["tag"]
         else:
             # possible template expansion
-            self.opts["rel_name"] = Template(
-                self.opts["rel_name"]).safe_substitute(self.gb_subs)
+            self.opts["rel_name"] = self._substitute(self.opts["rel_name"])
 
     def _find_tag(self):
         """Find release by tag name (can't find tag by tag name)."""
         logger.info("Finding tag: %s", self.working_release.tag_name)
 
-        # get tag list is not done already
-        logger.info("Getting tag list")
+        check_tag = self.get_tags().get(self.working_release.tag_name)
+        if check_tag is not None:
+            logger.info("Found tag: %s", check_tag.name)
+        return check_tag
 
-        # find by filename
-        for check_tag in self.repo.get_tags():
-            if check_tag.name == self.working_release.tag_name:
-                logger.info("Found tag: %s", check_tag.name)
-                return check_tag
-        return None
+    def get_tags(self):
+        """
+        Get the repo's tags as a dict by name, only going to the API the
+        first time.
+        """
+        if self.lists.get("tags") is None:
+            # get tag list is not done already
+            logger.info("Getting tag list")
+            self.lists["tags"] = {
+                tag.name: tag for tag in self.repo.get_tags()}
+
+        return self.lists["tags"]
+
+    def refresh_release(self):
+        """
+        Refresh the working release using a conditional request.
+
+        PyGithub sends the release's ETag as If-None-Match, so an
+        unchanged release costs a 304, which GitHub does not count
+        against the rate limit, rather than re-fetching repo and release.
+        """
+        logger.info("Refreshing release")
+        if self.working_release.update():
+            self.lists["assets"] = None
 
     def get_release(self):
         """Initialize repo and release (find through API)."""
+        # deferred so that --help and argument errors skip loading PyGithub
+        import github  # pylint: disable=import-outside-toplevel
+
         logger.info("Getting release")
 
         self.lists["assets"] = None
-        github_conn = github.Github(
-            self.opts["api_token"], per_page=Arguments.PER_PAGE)
 
-        try:
-            self.repo = github_conn.get_repo(self.opts["slug"], lazy=False)
-        except github.GithubException:
-            raise_error("Repository not found.", ReferenceError)
+        # the repository doesn't change during a run, only fetch it once
+        if self.repo is None or self.repo.full_name != self.opts["slug"]:
+            github_conn = _github_client(self.opts["api_token"])
+
+            try:
+                self.repo = github_conn.get_repo(
+                    self.opts["slug"], lazy=False)
+            except github.GithubException:
+                raise_error("Repository not found.", ReferenceError)
 
         try:
             if self.flags["latest"]:
@@ -613,6 +696,9 @@ class Arguments():
 
     def summary(self):
         """Log a summary of the arguments."""
+        # skip building the per-file lines when nothing would be logged
+        if not logger.isEnabledFor(logging.INFO):
+            return
 
         logger.info("Arguments:")
         logger.info("user command: %s", self.opts["user_cmd"])
@@ -620,17 +706,17 @@ class Arguments():
         logger.info("slug: %s", self.opts["slug"])
         logger.info("tag: %s", self.opts["tag"])
 
-        if hasattr(self.flags, 'latest'):
+        if 'latest' in self.flags:
             logger.info("latest: %s", self.flags["latest"])
-        if hasattr(self.opts, 'target_commitish'):
+        if 'target_commitish' in self.opts:
             logger.info("target_commitish: %s", self.opts["target_commitish"])
-        if hasattr(self.opts, 'rel_name'):
+        if 'rel_name' in self.opts:
             logger.info("rel_name: %s", self.opts["rel_name"])
-        if hasattr(self.opts, 'body'):
+        if 'body' in self.opts:
             logger.info("body: %s", self.opts["body"])
-        if hasattr(self.flags, 'pre'):
+        if 'pre' in self.flags:
             logger.info("pre: %s", self.flags["pre"])
-        if hasattr(self.flags, 'draft'):
+        if 'draft' in self.flags:
             logger.info("draft: %s", self.flags["draft"])
 
         logger.info("# files: %d", len(self.lists["file_info"]))
@@ -648,16 +734,21 @@ class Arguments():
                     logger.info("sha256: %s", info['sha256'])
 
 
-class ReleaseMgr():
+class ReleaseMgr(_upload.ReleaseAssetsMixin):
     """
     Utility class for managing GitHub releases.
 
     Attributes:
         args: An instance of satsuki.Arguments containing
             the configuration information for Satsuki.
-        release_asset: A release asset, such as a binary file.
+        release_asset: The most recently uploaded release asset.
+        lock: A threading.Lock guarding the release shared by concurrent
+            uploads.
     """
 
+    # release_asset and lock are slots of ReleaseAssetsMixin
+    __slots__ = ('args',)
+
     def __init__(self, args=None):
         """Initialize the instance."""
         logger.info("ReleaseMgr:")
@@ -670,6 +761,7 @@ class ReleaseMgr():
             )
 
         self.release_asset = None
+        self.lock = threading.Lock()
 
     def summary(self):
         """Log summary of the arguments."""
@@ -681,7 +773,7 @@ class ReleaseMgr():
         if isinstance(self.args.opts["tag"], int):
             # PyGithub will treat it as a release id when finding later
             raise_error(
-                "Integer tag name given: " + self.args.opts["tag"],
+                f"Integer tag name given: {self.args.opts['tag']}",
                 TypeError
             )
         if not isinstance(self.args.opts["target_commitish"], str):
@@ -701,6 +793,9 @@ class ReleaseMgr():
             target_commitish=self.args.opts["target_commitish"]
         )
 
+        # creating a release may have created its tag
+        self.args.lists["tags"] = None
+
     def _update_release(self):
         """Update an existing release."""
 
@@ -715,170 +810,12 @@ class ReleaseMgr():
             prerelease=self.args.flags["pre"]
         )
 
-    def _find_release_asset(self, asset_id):
-        """
-        Find a release asset associated with a release.
-
-        Since no search functionality is available through PyGithub, this is a
-        rudamentary search, going through list of assets one at
-        a time, comparing filenames, until found.
-
-        Args:
-            asset_id: A str or int representing a tag or release ID of a
-                release.
-
-        Todo: May not work with long lists of assets, based on
-        paginated lists.
-        """
-        logger.info("Finding asset: %s", asset_id)
-
-        # get asset list
-        logger.info("Getting asset list")
-        self.args.lists["assets"] = self.args.working_release.get_assets()
-
-        if isinstance(asset_id, str):
-
-            # find by filename
-            filename = asset_id
-            for check_asset in self.args.lists["assets"]:
-                if check_asset.name == filename:
-                    logger.info("Found asset: %s", filename)
-                    self.release_asset = check_asset
-                    return True
-
-        elif isinstance(asset_id, int):
-
-            for check_asset in self.args.lists["assets"]:
-                if check_asset.asset_id == asset_id:
-                    logger.info("Found asset: %s", asset_id)
-                    self.release_asset = check_asset
-                    return True
-
-        return False
-
-    def _delete_release_asset(self, filename):
-        """
-        There is no way to update a release asset's payload (i.e., the
-        file). You can update the name and label but to update the file
-        you must delete and re-upload. This method allows deleting
-        the release asset.
-        https://github.com/PyGithub/PyGithub/blob/e9e09b9dda6020b583d17cd727d851c1a79e7150/github/GitReleaseAsset.py#L162
-
-        """
-        logger.info("Deleting release asset (if exists): %s", filename)
-
-        if self._find_release_asset(filename):
-            logger.info("File exists, deleting...")
-            self.release_asset.delete_asset()
-
-    def _handle_upload_error(self, upload_error, file_info, complete_filesize):
-        logger.warning("Upload error!")
-        logger.warning("Error (%s): %s", type(upload_error), upload_error)
-
-        if isinstance(upload_error, (
-                github.GithubException, BrokenPipeError,
-                socket.timeout, ConnectionAbortedError)):
-            # possible non errors
-            logger.info("This may be an inconsequential error...")
-
-            if self._find_release_asset(file_info['filename']) \
-                    and hasattr(self.release_asset, 'size') \
-                    and self.release_asset.size == complete_filesize:
-                logger.info("File uploaded correctly")
-                return True
-
-        return False
-
-    def _upload_file(self, file_info):
-        """Upload an individual file to the release."""
-        # no way to update uploaded file, so delete->upload
-        self._delete_release_asset(file_info['filename'])
-
-        # path, label="", content_type=""
-        complete_filesize = os.path.getsize(file_info['path'])
-        logger.info("Size of %s: %d", file_info['filename'], complete_filesize)
-        attempts = 0
-        success = False
-        upload_error = ConnectionError
-
-        while attempts < Arguments.MAX_UPLOAD_ATTEMPTS and not success:
-            time.sleep(30 * attempts)
-            attempts += 1
-            upload_args = {}
-            if file_info['label'] is None:
-                upload_args['label'] = file_info['filename']
-            else:
-                upload_args['label'] = file_info['label']
-
-            if file_info['mime-type'] is not None:
-                upload_args['content_type'] = file_info['mime-type']
-
-            self.release_asset = None
-            upload_error = None
-
-            logger.info("Uploading file: %s", file_info['filename'])
-            logger.info(
-                "Attempt: %s",
-                str(attempts) + '/' + str(Arguments.MAX_UPLOAD_ATTEMPTS))
-
-            try:
-                self.release_asset = self.args.working_release.upload_asset(
-                    file_info['path'], **upload_args)
-            except (
-                    BrokenPipeError, socket.timeout, github.GithubException,
-                    ConnectionError, ConnectionAbortedError) as exc:
-                upload_error = exc
-            finally:
-                # fix for PyGithub issue, renew the repo
-                # might be able to remove when PR #771 is merged
-                # https://github.com/PyGithub/PyGithub/pull/771
-                self.args.get_release()
-
-            if upload_error is None \
-                    and hasattr(self.release_asset, 'size') \
-                    and self.release_asset.size == complete_filesize:
-                success = True
-            elif self._handle_upload_error(
-                    upload_error, file_info, complete_filesize):
-                success = True
-
-        # attempts are done...
-        self._check_upload(success, upload_error)
-
-    def _check_upload(self, success, upload_error):
-        if success:
-            logger.info("Successfully uploaded: %s", self.release_asset.name)
-            logger.info("Size: %d", self.release_asset.size)
-            logger.info("ID: %s", self.release_asset.id)
-        else:
-            if upload_error is not None:
-                raise upload_error
-            raise ConnectionError
-
-    def _upload_files(self):
-        """Upload files to a release."""
-        files_to_upload = len(self.args.lists["file_info"])
-        file_uploading = 0
-
-        for file_info in self.args.lists["file_info"]:
-
-            file_uploading += 1
-
-            logger.info(
-                "Uploading file %s...",
-                str(file_uploading) + "/" + str(files_to_upload)
-            )
-            logger.info("Prepping upload of %s", file_info['filename'])
-
-            self._upload_file(file_info)
-
     def _delete_file(self):
         """Delete a file (i.e., release asset) from a release."""
 
         logger.info("Deleting release asset: %s", self.args.opts["tag"])
-        for info in self.args.lists["file_info"]:
-            if self._find_release_asset(info['filename']):
-                self.release_asset.delete_asset()
+        self._delete_release_assets(
+            [info['filename'] for info in self.args.lists["file_info"]])
 
     def _delete_release(self):
         """Delete a release."""
@@ -894,39 +831,119 @@ class ReleaseMgr():
                 or self.args.flags["include_tag"]:
             logger.info("Cleaning tag(s): %s", self.args.opts["tag"])
 
-            for tag in self.args.repo.get_tags():
-                if fnmatch.fnmatch(tag.name, self.args.opts["tag"]):
-                    try:
-                        release = self.args.repo.get_release(tag.name)
-                        if self.args.flags["force"]:
-                            logger.info("Deleting release: %s", release.title)
-                            release.delete_release()
-                            raise github.UnknownObjectException(
-                                "404", "Spoof to hit except", headers=None)
+            releases = self._find_tag_releases(self.args.opts["tag"])
 
+            tags_to_delete = []
+            for tag_name, release in releases.items():
+                if release is not None:
+                    if not self.args.flags["force"]:
                         logger.info(
                             "Tag %s still connected to release: %s",
-                            tag.name,
+                            tag_name,
                             "not deleting")
-                    except github.UnknownObjectException:
-                        # No release exists, get rid of tag
-                        # delete the local tag (if any)
-                        logger.info("Deleting local tag: %s", tag.name)
-                        try:
-                            subprocess.run(
-                                ['git', 'tag', '--delete', tag.name],
-                                check=True)
-                        except subprocess.CalledProcessError as err:
-                            logger.info("Trouble deleting local tag: %s", err)
-
-                        # delete the remote tag (if any)
-                        logger.info("Deleting remote tag: %s", tag.name)
-                        try:
-                            subprocess.run(
-                                ['git', 'push', '--delete', 'origin',
-                                 tag.name], check=True)
-                        except subprocess.CalledProcessError as err:
-                            logger.info("Trouble deleting remote tag: %s", err)
+                        continue
+
+                    logger.info("Deleting release: %s", release.title)
+                    release.delete_release()
+
+                # No release exists, get rid of tag
+                tags_to_delete.append(tag_name)
+
+            if tags_to_delete:
+                self._delete_git_tags(tags_to_delete)
+                if self.args.lists.get("tags") is not None:
+                    for tag_name in tags_to_delete:
+                        self.args.lists["tags"].pop(tag_name, None)
+
+    def _find_tag_releases(self, pattern):
+        """
+        Find the tags matching a pattern, returning a dict of each tag
+        name to its release (or None if it has no release).
+        """
+        import github  # pylint: disable=import-outside-toplevel
+
+        if not glob.has_magic(pattern):
+            # a plain tag name can be looked up directly, no listings
+            # get_git_ref() is lazy, reading the ref's object fetches it
+            try:
+                _ = self.args.repo.get_git_ref("tags/" + pattern).object
+            except github.UnknownObjectException:
+                return {}
+
+            try:
+                return {pattern: self.args.repo.get_release(pattern)}
+            except github.UnknownObjectException:
+                return {pattern: None}
+
+        # translate the glob once rather than on every fnmatch call
+        tag_pattern = re.compile(fnmatch.translate(pattern))
+        matching_tags = [
+            tag_name for tag_name in self.args.get_tags()
+            if tag_pattern.match(tag_name)]
+
+        # one release listing instead of a get_release() probe per tag;
+        # drafts are skipped, like get_release(<tag>) on the plain path
+        releases = {}
+        if matching_tags:
+            releases = {
+                release.tag_name: release
+                for release in self.args.repo.get_releases()
+                if not release.draft}
+
+        return {tag_name: releases.get(tag_name) for tag_name in matching_tags}
+
+    @staticmethod
+    def _delete_git_tags(tag_names):
+        """Delete the given tags from the local and remote git repos."""
+        # delete the local tags (if any), git accepts several at once
+        logger.info("Deleting local tag(s): %s", ", ".join(tag_names))
+        ReleaseMgr._run_git_on_tags(
+            ['git', 'tag', '--delete'], tag_names, "local")
+
+        # delete the remote tags (if any) in a single push
+        logger.info("Deleting remote tag(s): %s", ", ".join(tag_names))
+        ReleaseMgr._run_git_on_tags(
+            ['git', 'push', '--delete', 'origin'], tag_names, "remote",
+            atomic=True)
+
+    @staticmethod
+    def _run_git_on_tags(command, tag_names, where, atomic=False):
+        """
+        Run a git command for all the tags at once.
+
+        git tag --delete removes every tag it can and only names the ones
+        it couldn't (a missing local tag is normal in CI), so its failure
+        is just logged. git push --delete is atomic: one tag missing on
+        the remote fails the push and deletes nothing, so an atomic
+        command that fails is rerun once per tag.
+        """
+        import subprocess  # pylint: disable=import-outside-toplevel
+
+        # close_fds=False lets subprocess use posix_spawn() instead of
+        # fork()/exec(); nothing sensitive is inheritable at this point
+        try:
+            subprocess.run(command + tag_names, check=True, close_fds=False)
+            return
+        except subprocess.CalledProcessError as err:
+            if not atomic:
+                logger.info(
+                    "Some %s tag(s) not deleted: %s", where, err)
+                return
+            if len(tag_names) == 1:
+                logger.warning(
+                    "Trouble deleting %s tag %s: %s",
+                    where,
+                    tag_names[0],
+                    err)
+                return
+
+        for tag_name in tag_names:
+            try:
+                subprocess.run(
+                    command + [tag_name], check=True, close_fds=False)
+            except subprocess.CalledProcessError as err:
+                logger.warning(
+                    "Trouble deleting %s tag %s: %s", where, tag_name, err)
 
     def execute(self):
         """Do what needs doing based on arguments configuration."""
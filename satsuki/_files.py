@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""satsuki file pattern expansion."""
+
+import fnmatch
+import glob
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)        # pylint: disable=invalid-name
+
+
+def expand_files(patterns):
+    """
+    Glob expand file patterns, returning a list of matching paths for
+    each pattern (in the same order as the patterns).
+
+    Patterns are grouped by directory so that each directory is listed
+    once with os.scandir, however many patterns point into it.
+    Literal paths and patterns with wildcards in the directory part go
+    through glob.
+    """
+    matches = {}
+    by_dir = {}
+    for i, pattern in enumerate(patterns):
+        logger.info("Processing: %s", pattern)
+        dirname, basename = os.path.split(pattern)
+        if not glob.has_magic(basename) or glob.has_magic(dirname):
+            # literal paths are only checked for existence, no listing
+            matches[i] = glob.glob(pattern)
+        else:
+            by_dir.setdefault(dirname, []).append((i, basename))
+
+    for dirname, dir_patterns in by_dir.items():
+        dir_matches = _scan_dir(
+            dirname, [basename for _, basename in dir_patterns])
+        for (i, _), matched in zip(dir_patterns, dir_matches):
+            matches[i] = matched
+
+    return [matches[i] for i in range(len(patterns))]
+
+
+def _scan_dir(dirname, basenames):
+    """
+    List a directory once and return the paths matching each basename
+    pattern. Each pattern is translated to a regex only once.
+    """
+    try:
+        with os.scandir(dirname or os.curdir) as entries:
+            names = [entry.name for entry in entries]
+    except OSError:
+        names = []
+
+    # like glob, only a pattern with a leading dot matches hidden files
+    dir_matches = [[] for _ in basenames]
+    compiled = [
+        (matched,
+         re.compile(fnmatch.translate(os.path.normcase(basename))).match,
+         basename[0] == '.')
+        for matched, basename in zip(dir_matches, basenames)]
+
+    for name in names:
+        hidden = name[0] == '.'
+        key = os.path.normcase(name)
+        for matched, match, dot in compiled:
+            if (dot or not hidden) and match(key):
+                matched.append(os.path.join(dirname, name))
+
+    return dir_matches
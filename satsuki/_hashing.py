@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""satsuki file hashing."""
+
+import concurrent.futures
+import hashlib
+import mmap
+import os
+import re
+import stat
+
+HASH_BLOCK_SIZE = 1 << 20
+HASH_MMAP_THRESHOLD = 64 << 20
+FILENAME_SHA256 = re.compile(
+    r'(?<![0-9a-fA-F])([0-9a-fA-F]{64})(?![0-9a-fA-F])')
+
+_HASH_CACHE = {}
+
+
+def get_file_size(filename):
+    """Return the size of a regular file, or None if there isn't one."""
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        return None
+
+    return file_stat.st_size if stat.S_ISREG(file_stat.st_mode) else None
+
+
+def get_hash(filename):
+    """
+    Produce SHA256 for the given file. Hashes are reused while the
+    file is unchanged.
+    """
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        return None
+
+    key = (
+        os.path.abspath(filename), file_stat.st_mtime_ns, file_stat.st_size)
+
+    if key not in _HASH_CACHE:
+        _HASH_CACHE[key] = _sha256(filename, file_stat.st_size)
+
+    return _HASH_CACHE[key]
+
+
+def _sha256(filename, size):
+    """Hash a file of the given size with SHA256."""
+    # unbuffered, so reads go straight into the hash's own buffer
+    with open(filename, "rb", buffering=0) as hash_file:
+        if size >= HASH_MMAP_THRESHOLD:
+            # large files are hashed straight from the page cache
+            with mmap.mmap(
+                    hash_file.fileno(), 0,
+                    access=mmap.ACCESS_READ) as mapped:
+                return hashlib.sha256(mapped).hexdigest()
+
+        if hasattr(hashlib, 'file_digest'):
+            # python 3.11+, read/update loop runs in C
+            return hashlib.file_digest(hash_file, "sha256").hexdigest()
+
+        # reuse one buffer rather than allocating bytes per chunk
+        sha256 = hashlib.sha256()
+        buffer = memoryview(bytearray(HASH_BLOCK_SIZE))
+        while True:
+            read_size = hash_file.readinto(buffer)
+            if not read_size:
+                break
+            sha256.update(buffer[:read_size])
+        return sha256.hexdigest()
+
+
+def hash_files(file_info, trust_filename=False):
+    """
+    Add the SHA256 hash to each file's info. Files are hashed several
+    at a time since hashlib releases the GIL while hashing. If
+    trust_filename is set, a hash embedded in a filename is used
+    instead of reading the file.
+    """
+    if trust_filename:
+        to_hash = []
+        for info in file_info:
+            found = FILENAME_SHA256.search(info['filename'])
+            if found:
+                info['sha256'] = found.group(1).lower()
+            else:
+                to_hash.append(info)
+        file_info = to_hash
+
+    if not file_info:
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(
+                os.cpu_count() or 1, len(file_info))) as executor:
+        for info, sha256 in zip(file_info, executor.map(
+                get_hash, [info['path'] for info in file_info])):
+            info['sha256'] = sha256
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""satsuki release asset uploads and deletes."""
+
+import concurrent.futures
+import logging
+import os
+import random
+import socket
+import time
+
+logger = logging.getLogger(__name__)        # pylint: disable=invalid-name
+
+MAX_UPLOAD_ATTEMPTS = 3
+UPLOAD_RETRY_BASE = 15
+UPLOAD_RETRY_CAP = 480
+RETRY_STATUSES = (429,) + tuple(range(500, 600))
+
+
+class ReleaseAssetsMixin():  # pylint: disable=too-few-public-methods
+    """
+    Release asset handling for satsuki.ReleaseMgr: finding, deleting and
+    uploading the assets of the working release. The class it is mixed
+    into provides args, an instance of satsuki.Arguments.
+
+    Attributes:
+        release_asset: The most recently uploaded release asset.
+        lock: A threading.Lock guarding the release shared by concurrent
+            uploads.
+    """
+
+    __slots__ = ('release_asset', 'lock')
+
+    def _find_release_asset(self, asset_id):
+        """
+        Find a release asset associated with a release.
+
+        Since no search functionality is available through PyGithub, the
+        release's asset list is fetched once (per release refresh) and
+        kept in a dict keyed by both filename (str) and ID (int).
+
+        Args:
+            asset_id: A str or int representing the filename or ID of a
+                release asset.
+
+        Returns:
+            The github.GitReleaseAsset if found, otherwise None.
+        """
+        logger.info("Finding asset: %s", asset_id)
+
+        with self.lock:
+            if self.args.lists["assets"] is None:
+                logger.info("Getting asset list")
+                assets = {}
+                for asset in self.args.working_release.get_assets():
+                    assets[asset.name] = asset
+                    assets[asset.id] = asset
+                self.args.lists["assets"] = assets
+            assets = self.args.lists["assets"]
+
+        release_asset = None
+        if isinstance(asset_id, (str, int)):
+            release_asset = assets.get(asset_id)
+
+        if release_asset is not None:
+            logger.info("Found asset: %s", asset_id)
+
+        return release_asset
+
+    def _forget_release_asset(self, release_asset):
+        """Drop a deleted release asset from the cached asset list."""
+        with self.lock:
+            if self.args.lists["assets"] is not None:
+                self.args.lists["assets"].pop(release_asset.name, None)
+                self.args.lists["assets"].pop(release_asset.id, None)
+
+    def _delete_release_asset(self, release_asset):
+        """
+        There is no way to update a release asset's payload (i.e., the
+        file). You can update the name and label but to update the file
+        you must delete and re-upload. This method allows deleting
+        the release asset.
+        https://github.com/PyGithub/PyGithub/blob/e9e09b9dda6020b583d17cd727d851c1a79e7150/github/GitReleaseAsset.py#L162
+
+        """
+        logger.info("Deleting release asset: %s", release_asset.name)
+        release_asset.delete_asset()
+        self._forget_release_asset(release_asset)
+
+    def _delete_release_assets(self, filenames):
+        """
+        Delete the release assets (if they exist) with the given
+        filenames in one pass, fetching the asset list only once.
+        """
+        existing = []
+        for filename in filenames:
+            release_asset = self._find_release_asset(filename)
+            if release_asset is not None:
+                existing.append(release_asset)
+
+        # deletes go to api.github.com over the client's one shared
+        # connection, which PyGithub doesn't make thread-safe, so they run
+        # one at a time (each is a single request)
+        for release_asset in existing:
+            self._delete_release_asset(release_asset)
+
+    @staticmethod
+    def _is_complete(release_asset, complete_filesize):
+        """
+        Check an uploaded asset against the local file size. The size
+        comes back with the upload (or asset list) response, so no
+        further request is needed to verify it.
+        """
+        # a single attribute resolution; PyGithub may lazily fetch on access
+        return getattr(release_asset, 'size', None) == complete_filesize
+
+    def _handle_upload_error(self, upload_error, file_info, complete_filesize):
+        import github  # pylint: disable=import-outside-toplevel
+
+        logger.warning("Upload error!")
+        logger.warning("Error (%s): %s", type(upload_error), upload_error)
+
+        if isinstance(upload_error, (
+                github.GithubException, BrokenPipeError,
+                socket.timeout, ConnectionAbortedError)):
+            # possible non errors
+            logger.info("This may be an inconsequential error...")
+
+            release_asset = self._find_release_asset(file_info['filename'])
+            if self._is_complete(release_asset, complete_filesize):
+                logger.info("File uploaded correctly")
+                return release_asset
+
+        return None
+
+    def _upload_file(self, file_info):
+        """Upload an individual file to the release."""
+        import github  # pylint: disable=import-outside-toplevel
+
+        # path, label="", content_type=""
+        complete_filesize = file_info.get('size')
+        if complete_filesize is None:
+            complete_filesize = os.path.getsize(file_info['path'])
+        logger.info("Size of %s: %d", file_info['filename'], complete_filesize)
+        attempts = 0
+        release_asset = None
+        upload_error = ConnectionError
+
+        # same for every attempt, so built once
+        upload_args = {
+            'label': (file_info['filename'] if file_info['label'] is None
+                      else file_info['label']),
+            **({'content_type': file_info['mime-type']}
+               if file_info['mime-type'] is not None else {}),
+        }
+
+        while attempts < MAX_UPLOAD_ATTEMPTS \
+                and release_asset is None:
+            if attempts:
+                if self._retried_by_client(upload_error):
+                    # the client's GithubRetry already used its attempts
+                    break
+                time.sleep(self._retry_delay(attempts, upload_error))
+            attempts += 1
+
+            uploaded = None
+            upload_error = None
+
+            logger.info("Uploading file: %s", file_info['filename'])
+            logger.info(
+                "Attempt: %d/%d", attempts, MAX_UPLOAD_ATTEMPTS)
+
+            try:
+                uploaded = self.args.working_release.upload_asset(
+                    file_info['path'], **upload_args)
+            except (
+                    BrokenPipeError, socket.timeout, github.GithubException,
+                    ConnectionError, ConnectionAbortedError) as exc:
+                upload_error = exc
+
+            if upload_error is None \
+                    and self._is_complete(uploaded, complete_filesize):
+                release_asset = uploaded
+            else:
+                # fix for PyGithub issue, renew the release before checking
+                # what made it up. only needed when something went wrong
+                # https://github.com/PyGithub/PyGithub/pull/771
+                with self.lock:
+                    self.args.refresh_release()
+
+                release_asset = self._handle_upload_error(
+                    upload_error, file_info, complete_filesize)
+
+        # attempts are done...
+        self._check_upload(release_asset, upload_error)
+
+    @staticmethod
+    def _retried_by_client(upload_error):
+        """
+        Check whether an upload error was already retried by the client.
+        GithubRetry covers POST, so rate limits and the statuses in
+        RETRY_STATUSES reach here only after its own retries ran out.
+        """
+        import github  # pylint: disable=import-outside-toplevel
+
+        return isinstance(upload_error, github.RateLimitExceededException) \
+            or (isinstance(upload_error, github.GithubException)
+                and upload_error.status in RETRY_STATUSES)
+
+    @staticmethod
+    def _retry_delay(attempts, upload_error=None):
+        """
+        Seconds to wait before the next upload attempt: exponential backoff
+        with jitter, or longer if GitHub said when to come back.
+        """
+        delay = min(
+            UPLOAD_RETRY_CAP,
+            UPLOAD_RETRY_BASE * 2 ** (attempts - 1))
+        delay += random.uniform(0, UPLOAD_RETRY_BASE / 2)
+
+        headers = {
+            key.lower(): value for key, value in
+            (getattr(upload_error, 'headers', None) or {}).items()}
+        try:
+            if 'retry-after' in headers:
+                delay = max(delay, int(headers['retry-after']))
+            elif headers.get('x-ratelimit-remaining') == '0':
+                delay = max(
+                    delay, int(headers['x-ratelimit-reset']) - time.time() + 2)
+        except (KeyError, ValueError):
+            pass
+
+        return delay
+
+    def _check_upload(self, release_asset, upload_error):
+        if release_asset is not None:
+            self.release_asset = release_asset
+            logger.info("Successfully uploaded: %s", release_asset.name)
+            logger.info("Size: %d", release_asset.size)
+            logger.info("ID: %s", release_asset.id)
+        else:
+            if upload_error is not None:
+                raise upload_error
+            raise ConnectionError
+
+    def _upload_files(self):
+        """Upload files to a release, several at a time."""
+        files_to_upload = len(self.args.lists["file_info"])
+        if not files_to_upload:
+            return
+
+        # no way to update uploaded file, so delete->upload
+        self._delete_release_assets(
+            [file_info['filename']
+             for file_info in self.args.lists["file_info"]])
+
+        # uploads go to uploads.github.com, which PyGithub sends over a new
+        # connection per request, so workers don't share the API client's
+        # connection; the API calls they make on errors hold self.lock
+        workers = min(self.args.opts["upload_workers"], files_to_upload)
+        logger.info(
+            "Uploading %d file(s), %d at a time", files_to_upload, workers)
+
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=workers) as executor:
+            futures = {
+                executor.submit(self._upload_file, file_info): file_info
+                for file_info in self.args.lists["file_info"]
+            }
+
+            file_uploaded = 0
+            for future in concurrent.futures.as_completed(futures):
+                # re-raises the upload error, if any
+                future.result()
+                file_uploaded += 1
+                logger.info(
+                    "Uploaded file %s (%d/%d)",
+                    futures[future]['filename'],
+                    file_uploaded,
+                    files_to_upload)
@@ -102,10 +102,19 @@ click.disable_unicode_literals_warning = True
               help='Whether to create SHA 256 hashes for upload files, and '
               + 'append them to the file label or upload them in a separate '
               + 'file.')
+@click.option('--trust-name-sha', 'trust_filename_hash',
+              envvar='SATS_TRUST_NAME_SHA', is_flag=True, default=False,
+              help='[Flag] When creating SHA 256 hashes, use a hash found in '
+              + 'a file name (64 hex digits) instead of hashing the file.')
 @click.option('--files-file', 'files_file', envvar='SATS_FILES_FILE',
               default=None, help='File containing name(s) of files to be '
               + 'uploaded.'
               + 'Default: Looks for gravitybee-files.json.')
+@click.option('--upload-workers', 'upload_workers',
+              envvar='SATS_UPLOAD_WORKERS', type=click.IntRange(min=1),
+              default=None, help='Number of files to upload at the same '
+              + 'time. Default: '
+              + str(satsuki.Arguments.DEFAULT_UPLOAD_WORKERS))
 def main(**kwargs):
     """Entry point for Satsuki CLI."""
     print("Satsuki CLI,", satsuki.__version__)
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 # pylint: disable=redefined-outer-name
 """Test Satsuki module."""
+import glob
+import hashlib
 import os
+import subprocess
 import uuid
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, PropertyMock
 
 import pytest
 import github
 import satsuki
-from satsuki import Arguments, ReleaseMgr
+from satsuki import Arguments, ReleaseMgr, _files, _hashing, _upload
 
 TEST_UUID = str(uuid.uuid1())
 TEST_SLUG = "plus3it/satsuki-tests"
@@ -23,11 +26,64 @@ def test_sha_hash():
         '809838efd41698422636fb2df8bebe2a7e8c29a3baf109b3bdceed6812266903'
 
 
+def test_sha_hash_multiple_blocks(tmp_path):
+    """Test getting the sha hash for a file larger than one read block. """
+    data = os.urandom(_hashing.HASH_BLOCK_SIZE * 2 + 17)
+    big_file = tmp_path / 'big.bin'
+    big_file.write_bytes(data)
+    assert Arguments.get_hash(str(big_file)) == \
+        hashlib.sha256(data).hexdigest()
+
+
+def test_sha_hash_mmap(tmp_path, monkeypatch):
+    """Test getting the sha hash for a file large enough to be mapped. """
+    monkeypatch.setattr(_hashing, 'HASH_MMAP_THRESHOLD', 1024)
+    data = os.urandom(4096)
+    big_file = tmp_path / 'big.bin'
+    big_file.write_bytes(data)
+    assert Arguments.get_hash(str(big_file)) == \
+        hashlib.sha256(data).hexdigest()
+
+
+def test_sha_hash_changed_file(tmp_path):
+    """Test that a cached sha hash isn't reused once the file changes. """
+    changing_file = tmp_path / 'changing.bin'
+    changing_file.write_bytes(b'first')
+    assert Arguments.get_hash(str(changing_file)) == \
+        hashlib.sha256(b'first').hexdigest()
+
+    changing_file.write_bytes(b'second version')
+    assert Arguments.get_hash(str(changing_file)) == \
+        hashlib.sha256(b'second version').hexdigest()
+
+
 def test_sha_hash_nonexistent_file():
     """Test what happens when getting a sha hash for nonexistent file. """
     assert Arguments.get_hash('nonexistent_file.xyz') is None
 
 
+def test_file_size():
+    """Test getting the size of a file, a directory and a missing file. """
+    assert Arguments.get_file_size(
+        os.path.join('tests', 'sha_hash_test.txt')) == \
+        os.path.getsize(os.path.join('tests', 'sha_hash_test.txt'))
+    assert Arguments.get_file_size('tests') is None
+    assert Arguments.get_file_size('nonexistent_file.xyz') is None
+
+
+def test_load_json_cached_copy(tmp_path):
+    """Test that cached JSON hands out independent copies. """
+    # pylint: disable=protected-access
+    files_file = tmp_path / 'files.json'
+    files_file.write_text('[{"filename": "a.txt", "path": "a.txt"}]')
+
+    first = satsuki._load_json(str(files_file))
+    first[0]['label'] = 'changed'
+    second = satsuki._load_json(str(files_file))
+
+    assert second == [{"filename": "a.txt", "path": "a.txt"}]
+
+
 def test_no_slug_arguments():
     """Test missing slug. """
     restore_enviro = os.environ
@@ -59,7 +115,7 @@ def test_gb_info():
             gb_info_file=os.path.join('tests', 'gravitybee-info.json'))
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_get_repo(mock_get_repo):
     """Test getting a repo for Github API. """
     mock_release = MagicMock()
@@ -75,7 +131,7 @@ def test_get_repo(mock_get_repo):
     mock_get_repo.return_value.get_release.assert_called_once()
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_get_latest_repo(mock_get_repo):
     """Test getting latest release. """
     mock_release = MagicMock()
@@ -94,7 +150,7 @@ def test_get_latest_repo(mock_get_repo):
     mock_get_repo.return_value.get_latest_release.assert_called_once()
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_no_release_no_tag(mock_get_repo):
     """Test error when no release/no tag exists. """
 
@@ -109,7 +165,7 @@ def test_no_release_no_tag(mock_get_repo):
             latest=True)
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_no_release(mock_get_repo):
     """Test create selected when no release exists. """
 
@@ -124,7 +180,7 @@ def test_no_release(mock_get_repo):
     assert args.opts["internal_cmd"] == Arguments.INTERNAL_CMD_CREATE
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_create_execute(mock_get_repo):
     """Test create selected when no release exists. """
     mock_release = MagicMock()
@@ -147,7 +203,7 @@ def test_create_execute(mock_get_repo):
     mock_get_repo.return_value.create_git_release.assert_called_once()
 
 
-@patch.object(satsuki.github.Github, 'get_repo', autospec=True)
+@patch.object(github.Github, 'get_repo', autospec=True)
 def test_find_and_delete(mock_get_repo):
     """Test find and delete release."""
     mock_release = MagicMock()
@@ -171,3 +227,401 @@ def test_blank_arguments():
     """Test authorization by getting blank arguments. """
     with pytest.raises(PermissionError):
         Arguments()
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_upload_files(mock_get_repo):
+    """Test uploading several files to an existing release."""
+    def upload_asset(path, **_):
+        uploaded = MagicMock()
+        uploaded.size = os.path.getsize(path)
+        return uploaded
+
+    old_asset = MagicMock()
+    old_asset.name = 'test.file'
+
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+    mock_release.get_assets.return_value = [old_asset]
+    mock_release.upload_asset.side_effect = upload_asset
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[
+            os.path.join('tests', 'test.file'),
+            os.path.join('tests', 'sha_hash_test.txt')])
+    assert args.opts["internal_cmd"] == Arguments.INTERNAL_CMD_UPDATE
+
+    rel_man = ReleaseMgr(args)
+    rel_man.execute()
+
+    old_asset.delete_asset.assert_called_once()
+    assert mock_release.upload_asset.call_count == 2
+    mock_release.update.assert_not_called()
+
+
+@patch('time.sleep')
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_upload_not_retried_twice(mock_get_repo, mock_sleep):
+    """Test that errors the client already retried aren't retried again."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+    mock_release.get_assets.return_value = []
+    mock_release.upload_asset.side_effect = \
+        github.GithubException(502, 'data', None)
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[os.path.join('tests', 'test.file')])
+
+    rel_man = ReleaseMgr(args)
+    with pytest.raises(github.GithubException):
+        rel_man.execute()
+
+    mock_release.upload_asset.assert_called_once()
+    mock_sleep.assert_not_called()
+
+
+@patch('subprocess.run')
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_delete_tags(mock_get_repo, mock_run):
+    """Test deleting tags that match a pattern and have no release."""
+    tags = []
+    for tag_name in ['Test-v1', 'Test-v2', 'Test-v3', 'Other-v1']:
+        tag = MagicMock()
+        tag.name = tag_name
+        tags.append(tag)
+
+    mock_release = MagicMock()
+    mock_release.tag_name = 'Test-v3'
+    mock_release.draft = False
+
+    # a draft doesn't keep its tag, just as get_release(<tag>) skips it
+    draft_release = MagicMock()
+    draft_release.tag_name = 'Test-v1'
+    draft_release.draft = True
+
+    mock_get_repo.return_value.get_tags.return_value = tags
+    mock_get_repo.return_value.get_releases.return_value = [
+        draft_release, mock_release]
+    mock_get_repo.return_value.get_release.side_effect = \
+        github.UnknownObjectException(404, 'data', None)
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag='Test-v*',
+        command=Arguments.CMD_DELETE)
+    assert args.opts["internal_cmd"] == Arguments.INTERNAL_CMD_DELETE_TAG
+
+    rel_man = ReleaseMgr(args)
+    rel_man.execute()
+
+    mock_run.assert_any_call(
+        ['git', 'tag', '--delete', 'Test-v1', 'Test-v2'],
+        check=True, close_fds=False)
+    mock_run.assert_any_call(
+        ['git', 'push', '--delete', 'origin', 'Test-v1', 'Test-v2'],
+        check=True, close_fds=False)
+    mock_release.delete_release.assert_not_called()
+    draft_release.delete_release.assert_not_called()
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_overlapping_file_patterns(mock_get_repo):
+    """Test that a file matched by several patterns is only added once."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[
+            os.path.join('tests', 'test.file'),
+            os.path.join('tests', 'test.*')])
+
+    assert [info['path'] for info in args.lists["file_info"]] == \
+        [os.path.join('tests', 'test.file')]
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_get_release_reuses_repo(mock_get_repo):
+    """Test that getting the release again doesn't refetch the repo."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+
+    mock_get_repo.return_value.full_name = TEST_SLUG
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG)
+    assert args.get_release()
+
+    assert mock_get_repo.call_count == 1
+    assert mock_get_repo.return_value.get_release.call_count == 2
+
+
+def test_expand_files():
+    """Test that patterns sharing a directory expand like glob."""
+    # pylint: disable=protected-access
+    patterns = [
+        os.path.join('tests', '*.json'),
+        os.path.join('tests', 'test.*'),
+        os.path.join('tests', 'nonexistent', '*'),
+        os.path.join('*', 'test.file')]
+
+    expanded = _files.expand_files(patterns)
+
+    assert len(expanded) == len(patterns)
+    for pattern, matched in zip(patterns, expanded):
+        assert sorted(matched) == sorted(glob.glob(pattern))
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_labels_follow_patterns(mock_get_repo):
+    """Test that each label applies to every file its pattern matches."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[
+            os.path.join('tests', '*.py'),
+            os.path.join('tests', 'test.file')],
+        label=['Python file', 'Test file'],
+        mime=['text/x-python', 'text/plain'])
+
+    assert len(args.lists["file_info"]) == 3
+    for info in args.lists["file_info"]:
+        if info['filename'].endswith('.py'):
+            assert info['label'].startswith('Python file')
+            assert info['mime-type'] == 'text/x-python'
+        else:
+            assert info['label'].startswith('Test file')
+            assert info['mime-type'] == 'text/plain'
+
+
+def test_bad_number_of_labels():
+    """Test providing more than one label but not one per file. """
+    with pytest.raises(AttributeError, match="Invalid number of labels: 2"):
+        Arguments(
+            token='abc',
+            slug=TEST_SLUG,
+            tag=TEST_TAG,
+            file=[
+                os.path.join('tests', 'test.file'),
+                os.path.join('tests', 'sha_hash_test.txt'),
+                os.path.join('tests', 'conftest.py')],
+            label=['one', 'two'])
+
+
+@pytest.mark.parametrize("upload_workers", [0, -1])
+def test_bad_upload_workers(upload_workers):
+    """Test providing a number of upload workers less than one. """
+    with pytest.raises(AttributeError):
+        Arguments(
+            token='abc',
+            slug=TEST_SLUG,
+            tag=TEST_TAG,
+            upload_workers=upload_workers)
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_sha_label(mock_get_repo):
+    """Test that each file's SHA256 hash is added to its label."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[
+            os.path.join('tests', 'test.file'),
+            os.path.join('tests', 'sha_hash_test.txt')],
+        file_sha=Arguments.FILE_SHA_LABEL)
+
+    assert len(args.lists["file_info"]) == 2
+    for info in args.lists["file_info"]:
+        assert info['sha256'] == Arguments.get_hash(info['path'])
+        assert info['label'] == \
+            info['filename'] + " (SHA256: " + info['sha256'] + ")"
+
+
+def test_trusted_filename_hash():
+    """Test using a hash from a filename instead of hashing the file. """
+    # pylint: disable=protected-access
+    name_sha = 'ab' * 32
+    file_info = [
+        {'filename': 'app-' + name_sha.upper() + '.whl',
+         'path': 'nonexistent_file.xyz'},
+        {'filename': 'test.file',
+         'path': os.path.join('tests', 'test.file')}]
+
+    _hashing.hash_files(file_info, trust_filename=True)
+
+    assert file_info[0]['sha256'] == name_sha
+    assert file_info[1]['sha256'] == \
+        Arguments.get_hash(os.path.join('tests', 'test.file'))
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_sha_file(mock_get_repo, tmp_path, monkeypatch):
+    """Test that the separate SHA256 file is listed with its own hash."""
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    test_file = os.path.abspath(os.path.join('tests', 'test.file'))
+    monkeypatch.chdir(tmp_path)
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        file=[test_file],
+        file_sha=Arguments.FILE_SHA_SEP_FILE)
+
+    sha_info = [
+        info for info in args.lists["file_info"]
+        if info['path'] != test_file][0]
+    assert sha_info['sha256'] == Arguments.get_hash(sha_info['path'])
+    assert sha_info['size'] == os.path.getsize(sha_info['path'])
+
+
+def test_upload_retry_delay():
+    """Test upload retry backoff, with and without a Retry-After header."""
+    # pylint: disable=protected-access
+    base = _upload.UPLOAD_RETRY_BASE
+    assert base <= ReleaseMgr._retry_delay(1) <= base * 1.5
+    assert base * 2 <= ReleaseMgr._retry_delay(2) <= base * 2.5
+    assert ReleaseMgr._retry_delay(20) <= \
+        _upload.UPLOAD_RETRY_CAP + base / 2
+
+    rate_limited = github.GithubException(
+        403, 'data', {'Retry-After': '600'})
+    assert ReleaseMgr._retry_delay(1, rate_limited) == 600
+
+
+@patch('subprocess.run')
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_delete_literal_tag(mock_get_repo, mock_run):
+    """Test deleting a single tag by name without listing tags."""
+    mock_get_repo.return_value.get_release.side_effect = \
+        github.UnknownObjectException(404, 'data', None)
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag='Test-v1',
+        command=Arguments.CMD_DELETE)
+    assert args.opts["internal_cmd"] == Arguments.INTERNAL_CMD_DELETE_TAG
+
+    rel_man = ReleaseMgr(args)
+    rel_man.execute()
+
+    mock_get_repo.return_value.get_git_ref.assert_called_once_with(
+        'tags/Test-v1')
+    mock_get_repo.return_value.get_tags.assert_not_called()
+    mock_run.assert_any_call(
+        ['git', 'tag', '--delete', 'Test-v1'],
+        check=True, close_fds=False)
+
+
+@patch('subprocess.run')
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_delete_missing_literal_tag(mock_get_repo, mock_run):
+    """Test that a missing tag is not deleted, even with a lazy ref."""
+    missing_ref = MagicMock()
+    type(missing_ref).object = PropertyMock(
+        side_effect=github.UnknownObjectException(404, 'data', None))
+    mock_get_repo.return_value.get_git_ref.return_value = missing_ref
+    mock_get_repo.return_value.get_release.side_effect = \
+        github.UnknownObjectException(404, 'data', None)
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag='Test-v1',
+        command=Arguments.CMD_DELETE)
+    release_lookups = mock_get_repo.return_value.get_release.call_count
+
+    rel_man = ReleaseMgr(args)
+    rel_man.execute()
+
+    assert mock_get_repo.return_value.get_release.call_count \
+        == release_lookups
+    mock_run.assert_not_called()
+
+
+@patch('subprocess.run')
+def test_delete_git_tags_failure(mock_run):
+    """Test that a failed remote push still deletes the remaining tags."""
+    def run(command, **_):
+        # a push naming the missing tag fails and deletes nothing
+        if command[:2] != ['git', 'tag'] and 'Test-v1' in command:
+            raise subprocess.CalledProcessError(1, command)
+
+    mock_run.side_effect = run
+
+    ReleaseMgr._delete_git_tags(  # pylint: disable=protected-access
+        ['Test-v1', 'Test-v2', 'Test-v3'])
+
+    mock_run.assert_any_call(
+        ['git', 'push', '--delete', 'origin', 'Test-v2'],
+        check=True, close_fds=False)
+    mock_run.assert_any_call(
+        ['git', 'push', '--delete', 'origin', 'Test-v3'],
+        check=True, close_fds=False)
+
+
+@patch.object(github.Github, 'get_repo', autospec=True)
+def test_delete_files(mock_get_repo):
+    """Test deleting release assets by filename."""
+    assets = []
+    for asset_name in ['one.file', 'two.file', 'kept.file']:
+        asset = MagicMock()
+        asset.name = asset_name
+        assets.append(asset)
+
+    mock_release = MagicMock()
+    mock_release.tag_name = TEST_TAG
+    mock_release.get_assets.return_value = assets
+
+    mock_get_repo.return_value.get_release.return_value = mock_release
+
+    args = Arguments(
+        token='abc',
+        slug=TEST_SLUG,
+        tag=TEST_TAG,
+        command=Arguments.CMD_DELETE,
+        file=['one.file', 'two.file', 'missing.file'])
+    assert args.opts["internal_cmd"] == Arguments.INTERNAL_CMD_DELETE_FILE
+
+    rel_man = ReleaseMgr(args)
+    rel_man.execute()
+
+    assets[0].delete_asset.assert_called_once()
+    assets[1].delete_asset.assert_called_once()
+    assets[2].delete_asset.assert_not_called()
+    mock_release.get_assets.assert_called_once()